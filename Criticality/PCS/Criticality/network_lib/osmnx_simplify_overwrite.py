@@ -2,10 +2,20 @@
 
 import time
 import logging as lg
-from shapely.geometry import Point, LineString
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, repeat
+import numpy as np
+from shapely.geometry import LineString
 from osmnx.utils import log
 
-def is_endpoint(G, node, strict=True):
+try:
+    from numba import njit
+except ImportError:
+    # numba is optional, without it walk_paths runs as plain python
+    njit = None
+
+def is_endpoint(G, node, centroids=None, strict=True):
     """
     Return True if the node is a "real" endpoint of an edge in the network, otherwise False.
     OSM data includes lots of nodes that exist only as points to help streets bend around curves.
@@ -19,29 +29,42 @@ def is_endpoint(G, node, strict=True):
     ----------
     G : graph
     node : int, the node to examine
+    centroids : frozenset, nodes flagged with IsCentroid == 1; read from the node attributes if None
     strict : bool, if False, allow nodes to be end points even if they fail all other rules but have edges with different OSM IDs
 
     Returns
     -------
     bool
     """
-    neighbors = set(list(G.predecessors(node)) + list(G.successors(node)))
-    n = len(neighbors)
-    d = G.degree(node)
+    # read the adjacency dicts once rather than going through the predecessors/successors/degree views
+    pred = G.pred[node]
+    succ = G.succ[node]
+
+    if centroids is None:
+        is_centroid = G.node[node].get('IsCentroid') == 1
+    else:
+        is_centroid = node in centroids
 
-    if G.node[node].get('IsCentroid') == 1:
+    if is_centroid:
         return True
     else:
 
-        if node in neighbors:
+        if node in succ:
             # if the node appears in its list of neighbors, it self-loops. this is always an endpoint.
             return True
 
         # if node has no incoming edges or no outgoing edges, it must be an end point
-        elif G.out_degree(node)==0 or G.in_degree(node)==0:
+        elif not pred or not succ:
             return True
 
-        elif not (n==2 and (d==2 or d==4)):
+        if G.is_multigraph():
+            # in a multigraph each neighbor maps to a dict of parallel edges keyed by edge key
+            d = sum(len(keys) for keys in pred.values()) + sum(len(keys) for keys in succ.values())
+        else:
+            d = len(pred) + len(succ)
+        n = len(pred.keys() | succ.keys())
+
+        if not (n==2 and (d==2 or d==4)):
             # else, if it does NOT have 2 neighbors AND either 2 or 4 directed edges, it is an endpoint
             # either it has 1 or 3+ neighbors, in which case it is a dead-end or an intersection of multiple streets
             # or it has 2 neighbors but 3 degree (indicating a change from oneway to twoway)
@@ -49,107 +72,220 @@ def is_endpoint(G, node, strict=True):
             return True
 
         elif not strict:
-            # non-strict mode
-            osmids = []
-
-            # add all the edge OSM IDs for incoming edges
-            for u in G.predecessors(node):
-                for key in G.edge[u][node]:
-                    osmids.append(G.edge[u][node][key]['osmid'])
-
-            # add all the edge OSM IDs for outgoing edges
-            for v in G.successors(node):
-                for key in G.edge[node][v]:
-                    osmids.append(G.edge[node][v][key]['osmid'])
+            # non-strict mode, collect all the edge OSM IDs for incoming and outgoing edges
+            osmids = frozenset(data['osmid'] for adj in (pred, succ) for edges in adj.values() for data in edges.values())
 
             # if there is more than 1 OSM ID in the list of edge OSM IDs then it is an endpoint, if not, it isn't
-            return len(set(osmids)) > 1
+            return len(osmids) > 1
 
         else:
             # if none of the preceding rules returned true, then it is not an endpoint
             return False
 
 
-def build_path(G, node, endpoints, path):
+def get_adjacency_arrays(G, nodes):
     """
-    Recursively build a path of nodes until you hit an endpoint node.
+    Build the CSR adjacency arrays of the graph straight from its successor dicts, one entry per
+    (u, v) pair with successors in the graph's own iteration order.
 
     Parameters
     ----------
     G : graph
-    node : int, the current node to start from
-    endpoints : set, the set of all nodes in the graph that are endpoints
-    path : list, the list of nodes in order in the path so far
+    nodes : list, the nodes of G, row i of the arrays is nodes[i]
 
     Returns
     -------
-    paths_to_simplify : list
+    indptr : numpy.ndarray, row pointers, the successors of nodes[i] are indices[indptr[i]:indptr[i+1]]
+    indices : numpy.ndarray, column indices
+    counts : numpy.ndarray, number of parallel edges behind each (u, v) pair
+    """
+    idx = {node: i for i, node in enumerate(nodes)}
+    # multigraph adjacency is nbr -> {key: data}, so each row is iterated for neighbors and its values for edge counts
+    succ = [G.succ[node] for node in nodes]
+    indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+    np.cumsum(np.fromiter(map(len, succ), dtype=np.int64, count=len(nodes)), out=indptr[1:])
+    n_pairs = int(indptr[-1])
+    indices = np.fromiter(map(idx.__getitem__, chain.from_iterable(succ)), dtype=np.int64, count=n_pairs)
+    counts = np.fromiter(map(len, chain.from_iterable(map(dict.values, succ))), dtype=np.int64, count=n_pairs)
+    return indptr, indices, counts
+
+
+def get_endpoint_mask(G, nodes, indptr, indices, counts, centroids, strict=True):
     """
-    # for each successor in the passed-in node
-    for successor in G.successors(node):
-        if not successor in path:
-            # if this successor is already in the path, ignore it, otherwise add it to the path
-            path.append(successor)
-            if not successor in endpoints:
-                # if this successor is not an endpoint, recursively call build_path until you find an endpoint
-                path = build_path(G, successor, endpoints, path)
-            else:
-                # if this successor is an endpoint, we've completed the path, so return it
-                return path
+    Identify all the endpoint nodes of the graph at once, applying the rules of is_endpoint to
+    in-degree, out-degree and neighbor-count arrays taken from the CSR adjacency arrays.
 
-    if (not path[-1] in endpoints) and (path[0] in G.successors(path[-1])):
-        # if the end of the path is not actually an endpoint and the path's first node is a successor of the
-        # path's final node, then this is actually a self loop, so add path's first node to end of path to close it
-        path.append(path[0])
+    Parameters
+    ----------
+    G : graph
+    nodes : list, the nodes of G in the row order of the arrays
+    indptr : numpy.ndarray, row pointers from get_adjacency_arrays
+    indices : numpy.ndarray, column indices from get_adjacency_arrays
+    counts : numpy.ndarray, parallel edge counts from get_adjacency_arrays
+    centroids : frozenset, nodes flagged with IsCentroid == 1
+    strict : bool, if False, allow nodes to be end points even if they fail all other rules but have edges with different OSM IDs
 
-    return path
+    Returns
+    -------
+    mask : numpy.ndarray of bool, True for the nodes that are endpoints
+    """
+    n = len(nodes)
+    rows = np.repeat(np.arange(n, dtype=np.int64), np.diff(indptr))
+    out_deg = np.bincount(rows, weights=counts, minlength=n)
+    in_deg = np.bincount(indices, weights=counts, minlength=n)
+    degree = in_deg + out_deg
+    selfloop = np.zeros(n, dtype=bool)
+    selfloop[rows[rows == indices]] = True
+    # distinct neighbors are the successors plus the predecessors, less the ones that are both
+    mutual = np.isin(rows * n + indices, indices * n + rows)
+    neighbor_count = (np.bincount(rows, minlength=n) + np.bincount(indices, minlength=n) -
+                      np.bincount(rows[mutual], minlength=n))
+    centroid = np.fromiter((node in centroids for node in nodes), dtype=bool, count=len(nodes))
+
+    mask = (centroid | selfloop | (in_deg == 0) | (out_deg == 0) |
+            ~((neighbor_count == 2) & ((degree == 2) | (degree == 4))))
+
+    if not strict:
+        # the OSM ID rule only applies to the remaining candidates, check those one at a time
+        for i in np.flatnonzero(~mask):
+            mask[i] = is_endpoint(G, nodes[i], centroids, strict=False)
+
+    return mask
+
+
+def walk_paths(endpoint_mask, indptr, indices):
+    """
+    Build every path to simplify on the CSR adjacency arrays, walking from each endpoint's successors until
+    another endpoint is hit. Compiled with numba when it is installed, otherwise run as plain python on lists;
+    the paths are returned flattened with an offsets array, path k being path_nodes[offsets[k]:offsets[k+1]].
 
+    Parameters
+    ----------
+    endpoint_mask : numpy.ndarray of bool or bytearray, true for the nodes that are endpoints
+    indptr : numpy.ndarray or list, row pointers from get_adjacency_arrays
+    indices : numpy.ndarray or list, column indices from get_adjacency_arrays
 
-def get_paths_to_simplify(G, strict=True):
+    Returns
+    -------
+    offsets : numpy.ndarray
+    path_nodes : numpy.ndarray
+    """
+    # every (u, v) pair is walked by at most one path and each path adds one node on top of its edges
+    # (or two when it closes a self loop), so twice the number of pairs bounds the output
+    n = len(endpoint_mask)
+    path_nodes = np.empty(2 * len(indices) + 1, dtype=np.int64)
+    offsets = np.zeros(len(indices) + 1, dtype=np.int64)
+    # in_path[i] holds the number of the last path node i was added to, standing in for a per-path set
+    in_path = np.full(n, -1, dtype=np.int64)
+    n_paths = 0
+    pos = 0
+
+    for start in range(n):
+        if not endpoint_mask[start]:
+            continue
+        for j in range(indptr[start], indptr[start + 1]):
+            node = indices[j]
+            if endpoint_mask[node]:
+                continue
+
+            path_nodes[pos] = start
+            path_nodes[pos + 1] = node
+            pos += 2
+            in_path[start] = n_paths
+            in_path[node] = n_paths
+
+            reached_endpoint = False
+            advanced = True
+            while advanced:
+                advanced = False
+                # interstitial nodes have two neighbors, one of which is already in the path, so there is at most one way forward
+                for k in range(indptr[node], indptr[node + 1]):
+                    successor = indices[k]
+                    if in_path[successor] != n_paths:
+                        # if this successor is already in the path, ignore it, otherwise add it to the path
+                        path_nodes[pos] = successor
+                        pos += 1
+                        in_path[successor] = n_paths
+                        if endpoint_mask[successor]:
+                            # if this successor is an endpoint, we've completed the path
+                            reached_endpoint = True
+                        else:
+                            # otherwise carry on walking from this successor until you find an endpoint
+                            node = successor
+                            advanced = True
+                        break
+
+            if not reached_endpoint:
+                # if the end of the path is not actually an endpoint and the path's first node is a successor of the
+                # path's final node, then this is actually a self loop, so add path's first node to end of path to close it
+                for k in range(indptr[node], indptr[node + 1]):
+                    if indices[k] == start:
+                        path_nodes[pos] = start
+                        pos += 1
+                        break
+
+            n_paths += 1
+            offsets[n_paths] = pos
+
+    return offsets[:n_paths + 1], path_nodes[:pos]
+
+
+if njit is not None:
+    compiled_walk_paths = njit(cache=True, nogil=True)(walk_paths)
+
+
+def get_paths_to_simplify(G, strict=True, nodes=None):
     """
-    Create a list of all the paths to be simplified between endpoint nodes.
+    Find all the paths to be simplified between endpoint nodes.
     The path is ordered from the first endpoint, through the interstitial nodes, to the second endpoint.
+    Paths are walked on contiguous integer ids (the position of each node in the node list) rather than node ids.
+    The walk happens when this is called; the paths are kept as one flat integer array and only turned
+    into lists one at a time as the returned generator is consumed.
 
     Parameters
     ----------
     G : graph
     strict : bool, if False, allow nodes to be end points even if they fail all other rules but have edges with different OSM IDs
+    nodes : list, if given, the paths are given as integer ids into this list instead of node ids
 
     Returns
     -------
-    paths_to_simplify : list
+    paths_to_simplify : generator of lists
     """
 
+    to_node_ids = nodes is None
+    if to_node_ids:
+        nodes = G.nodes()
+    if not nodes:
+        return iter([])
+
     # first identify all the nodes that are endpoints
     start_time = time.time()
-    endpoints = set([node for node in G.nodes() if is_endpoint(G, node, strict=strict)])
-    log('Identified {:,} edge endpoints in {:,.2f} seconds'.format(len(endpoints), time.time()-start_time))
+    centroids = frozenset(n for n, data in G.nodes(data=True) if data.get('IsCentroid') == 1)
+    indptr, indices, counts = get_adjacency_arrays(G, nodes)
+    endpoint_mask = get_endpoint_mask(G, nodes, indptr, indices, counts, centroids, strict=strict)
+    log('Identified {:,} edge endpoints in {:,.2f} seconds'.format(int(endpoint_mask.sum()), time.time()-start_time))
 
     start_time = time.time()
-    paths_to_simplify = []
-
-    # for each endpoint node, look at each of its successor nodes
-    for node in endpoints:
-        for successor in G.successors(node):
-            if not successor in endpoints:
-                # if the successor is not an endpoint, build a path from the endpoint node to the next endpoint node
-                try:
-                    path = build_path(G, successor, endpoints, path=[node, successor])
-                    paths_to_simplify.append(path)
-                except RuntimeError:
-                    log('Recursion error: exceeded max depth, moving on to next endpoint successor', level=lg.WARNING)
-                    # recursion errors occur if some connected component is a self-contained ring in which all nodes are not end points
-                    # handle it by just ignoring that component and letting its topology remain intact (this should be a rare occurrence)
-                    # RuntimeError is what Python <3.5 will throw, Py3.5+ throws RecursionError but it is a subtype of RuntimeError so it still gets handled
+    if njit is not None:
+        # walk the paths in compiled code on the integer adjacency arrays
+        offsets, path_nodes = compiled_walk_paths(endpoint_mask, indptr, indices)
+    else:
+        # the same walk in python, on lists and a bytearray mask which index faster than numpy arrays
+        offsets, path_nodes = walk_paths(bytearray(endpoint_mask.tobytes()), indptr.tolist(), indices.tolist())
+    offsets = offsets.tolist()
+    log('Constructed {:,} paths to simplify in {:,.2f} seconds'.format(len(offsets)-1, time.time()-start_time))
 
-    log('Constructed all paths to simplify in {:,.2f} seconds'.format(time.time()-start_time))
-    return paths_to_simplify
+    bounds = zip(offsets[:-1], offsets[1:])
+    if to_node_ids:
+        return ([nodes[i] for i in path_nodes[a:b].tolist()] for a, b in bounds)
+    return (path_nodes[a:b].tolist() for a, b in bounds)
 
 
 def is_simplified(G):
     """
-    Determine if a graph has already had its topology simplified. If any of its edges have a
-    geometry attribute, we know that it has previously been simplified.
+    Determine if a graph has already had its topology simplified. simplify_graph flags the graphs it
+    returns; otherwise, if any of its edges have a geometry attribute, we know that it has previously been simplified.
 
     Parameters
     ----------
@@ -159,11 +295,169 @@ def is_simplified(G):
     -------
     bool
     """
-    edges_with_geometry = [d for u, v, k, d in G.edges(data=True, keys=True) if 'geometry' in d]
-    return len(edges_with_geometry) > 0
+    if G.graph.get('_simplified'):
+        return True
+
+    # stop at the first edge with a geometry rather than collecting all of them
+    return any('geometry' in d for u, v, d in G.edges_iter(data=True))
+
+
+def get_path_edges(adj, path):
+    """
+    Collect the attribute dicts of the edges along a path to be simplified.
+
+    Parameters
+    ----------
+    adj : dict, the adjacency of the graph (G.adj)
+    path : list, the nodes of the path in order
+
+    Returns
+    -------
+    path_edges : list
+    """
+    path_edges = []
+    for u, v in zip(path[:-1], path[1:]):
+
+        # there shouldn't be multiple edges between interstitial nodes
+        edges = adj[u][v]
+        if not len(edges) == 1:
+            log('Multiple edges between "{}" and "{}" found when simplifying'.format(u, v), level=lg.WARNING)
+
+        # the only element in this dict as long as above assertion is True. take the first edge rather than key 0,
+        # MultiGraphs index keys with ints from 0 and up but key 0 may have been removed
+        path_edges.append(next(iter(edges.values())))
 
+    return path_edges
 
-def simplify_graph(G_, strict=True, sums=['length']):
+
+def is_duplicate(first_val, second_val):
+    """
+    Test whether second_val would be dropped as a repeat of first_val by the collection in merge_path_edges:
+    hashable values are compared through a set, unhashable ones (eg, lists of OSM IDs) through a list.
+
+    Parameters
+    ----------
+    first_val : the attribute value already collected
+    second_val : the attribute value to test
+
+    Returns
+    -------
+    bool
+    """
+    try:
+        seen = {first_val}
+    except TypeError:
+        # an unhashable first value never makes it into the seen-set
+        seen = set()
+    try:
+        return second_val in seen
+    except TypeError:
+        return second_val in [first_val]
+
+
+def merge_edge_pair(first, second, path_coords, sums=['length']):
+    """
+    Merge the two edges around a single interstitial node, giving the same result as merge_path_edges
+    without the list collection and de-duplication it needs for longer paths.
+
+    Parameters
+    ----------
+    first : dict, the attributes of the edge into the interstitial node
+    second : dict, the attributes of the edge out of the interstitial node
+    path_coords : numpy.ndarray, the (x, y) coordinates of the three nodes along the path
+    sums : list, the attributes to sum over the path rather than collect
+
+    Returns
+    -------
+    edge_attributes : dict
+    """
+    edge_attributes = {}
+    for key, val in first.items():
+        if key in sums:
+            continue
+        if key in second and not is_duplicate(val, second[key]):
+            # if the two edges have different values, keep one of each value
+            edge_attributes[key] = [val, second[key]]
+        else:
+            edge_attributes[key] = val
+    for key, val in second.items():
+        if not key in first and not key in sums:
+            edge_attributes[key] = val
+
+    edge_attributes['geometry'] = LineString(path_coords)
+    for attr in sums:
+        if attr in first and attr in second:
+            edge_attributes[attr] = first[attr] + second[attr]
+        else:
+            # like merge_path_edges, this raises a KeyError if neither edge has the attribute
+            edge_attributes[attr] = first[attr] if attr in first else second[attr]
+
+    return edge_attributes
+
+
+def merge_path_edges(path_edges, path_coords, sums=['length']):
+    """
+    Merge the edges of a path into the attributes of the single edge that replaces them.
+    Only takes plain data, so it can run in a worker process.
+
+    Parameters
+    ----------
+    path_edges : list, the attribute dicts of the edges along the path
+    path_coords : numpy.ndarray, the (x, y) coordinates of the nodes along the path
+    sums : list, the attributes to sum over the path rather than collect
+
+    Returns
+    -------
+    edge_attributes : dict
+    """
+    if len(path_edges) == 2:
+        # most paths have a single interstitial node, merge its two edges directly
+        return merge_edge_pair(path_edges[0], path_edges[1], path_coords, sums)
+
+    # add the interstitial edges we're removing to a list so we can retain their spatial geometry
+    # values are de-duplicated as they are collected, except for the attributes that get summed
+    edge_attributes = defaultdict(list)
+    edge_attr_seen = defaultdict(set)
+    for edge in path_edges:
+        for key, val in edge.items():
+            if not key in sums:
+                try:
+                    if val in edge_attr_seen[key]:
+                        # this value was already collected for this key, keep one of each value
+                        continue
+                    edge_attr_seen[key].add(val)
+                except TypeError:
+                    # unhashable values (eg, lists of OSM IDs) are checked against the collected list instead
+                    if val in edge_attributes[key]:
+                        continue
+            edge_attributes[key].append(val)
+
+    # back to a plain dict, so a sums attribute that none of the edges have raises a KeyError rather than summing to 0
+    edge_attributes = dict(edge_attributes)
+    for key in edge_attributes:
+        # don't touch the length attribute, we'll sum it at the end
+        if len(edge_attributes[key]) == 1 and not key in sums:
+            # if there's only 1 unique value in this attribute list, consolidate it to the single value (the zero-th)
+            edge_attributes[key] = edge_attributes[key][0]
+
+    # construct the geometry and sum the lengths of the segments
+    edge_attributes['geometry'] = LineString(path_coords)
+    for attr in sums:
+        values = edge_attributes[attr]
+        arr = np.asarray(values) if len(values) > 8 else None
+        if arr is None or arr.dtype == object:
+            # short paths aren't worth the array setup, and values numpy can't hold natively
+            # (eg, missing values or ints beyond int64) are summed as python objects
+            edge_attributes[attr] = sum(values)
+        else:
+            # reduce long paths in numpy; give back python numbers for python inputs, so the type matches sum
+            total = np.add.reduce(arr)
+            edge_attributes[attr] = total if isinstance(values[0], np.generic) else total.item()
+
+    return edge_attributes
+
+
+def simplify_graph(G_, strict=True, sums=['length'], processes=1):
     """
     Simplify a graph's topology by removing all nodes that are not intersections or dead-ends.
     Create an edge directly between the end points that encapsulate them,
@@ -173,6 +467,8 @@ def simplify_graph(G_, strict=True, sums=['length']):
     ----------
     G_ : graph
     strict : bool, if False, allow nodes to be end points even if they fail all other rules but have edges with different OSM IDs
+    sums : list, the edge attributes to sum over each simplified path
+    processes : int, number of worker processes to merge the paths with, the merge runs in this process if 1
 
     Returns
     -------
@@ -182,65 +478,63 @@ def simplify_graph(G_, strict=True, sums=['length']):
     if is_simplified(G_):
         raise Exception('This graph has already been simplified, cannot simplify it again.')
 
-    G = G_.copy()
-    initial_node_count = len(list(G.nodes()))
-    initial_edge_count = len(list(G.edges()))
-    all_nodes_to_remove = []
+    # G_ is only read from, the simplified graph is built fresh below, so it isn't copied first
+    G = G_
+    initial_node_count = G.number_of_nodes()
+    # in networkx 1.x number_of_edges builds the whole degree dict through size(), counting the key dicts is cheaper
+    initial_edge_count = sum(len(keys) for nbrs in G.succ.values() for keys in nbrs.values())
+    nodes_to_remove = set()
     all_edges_to_add = []
 
-    # construct a list of all the paths that need to be simplified
-    paths = get_paths_to_simplify(G, strict=strict)
+    # work on contiguous integer ids, so node lookups below are array indexing rather than hashing
+    nodes = G.nodes()
+
+    # find the paths that need to be simplified, each one is only expanded into a list as it is merged below
+    paths = get_paths_to_simplify(G, strict=strict, nodes=nodes)
+
+    # look up each node's coordinates once, as an (n, 2) array indexed by integer id
+    node_data = G.node
+    xy = np.fromiter((c for node in nodes for c in (node_data[node]['x'], node_data[node]['y'])),
+                     dtype=np.float64, count=2*len(nodes)).reshape(-1, 2)
 
     start_time = time.time()
-    for path in paths:
-
-        # add the interstitial edges we're removing to a list so we can retain their spatial geometry
-        edge_attributes = {}
-        for u, v in zip(path[:-1], path[1:]):
-
-            # there shouldn't be multiple edges between interstitial nodes
-            edges = G.edge[u][v]
-            if not len(edges) == 1:
-                log('Multiple edges between "{}" and "{}" found when simplifying'.format(u, v), level=lg.WARNING)
-
-            # the only element in this list as long as above assertion is True (MultiGraphs use keys (the 0 here), indexed with ints from 0 and up)
-            edge = edges[0]
-            for key in edge:
-                if key in edge_attributes:
-                    # if this key already exists in the dict, append it to the value list
-                    edge_attributes[key].append(edge[key])
-                else:
-                    # if this key doesn't already exist, set the value to a list containing the one value
-                    edge_attributes[key] = [edge[key]]
-
-        for key in edge_attributes:
-            # don't touch the length attribute, we'll sum it at the end
-            if len(set(edge_attributes[key])) == 1 and not key in sums:
-                # if there's only 1 unique value in this attribute list, consolidate it to the single value (the zero-th)
-                edge_attributes[key] = edge_attributes[key][0]
-            elif not key in sums:
-                # otherwise, if there are multiple values, keep one of each value
-                edge_attributes[key] = list(set(edge_attributes[key]))
-
-        # construct the geometry and sum the lengths of the segments
-        edge_attributes['geometry'] = LineString([Point((G.node[node]['x'],
-                                                         G.node[node]['y'])) for node in path])
-        for attr in sums:
-            edge_attributes[attr] = sum(edge_attributes[attr])
+
+    # the merge itself only needs the plain edge dicts and coordinates of each path
+    adj = G.adj
+    if processes > 1:
+        # the pool takes every path up front, so they are gathered first
+        paths = list(paths)
+        path_edges = (get_path_edges(adj, [nodes[i] for i in path]) for path in paths)
+        path_coords = (xy[path] for path in paths)
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            merged = list(executor.map(merge_path_edges, path_edges, path_coords, repeat(sums), chunksize=128))
+        merged = zip(paths, merged)
+    else:
+        merged = ((path, merge_path_edges(get_path_edges(adj, [nodes[i] for i in path]), xy[path], sums)) for path in paths)
+
+    for path, edge_attributes in merged:
 
         # add the nodes and edges to their lists for processing at the end
-        all_nodes_to_remove.extend(path[1:-1])
-        all_edges_to_add.append({'origin':path[0],
-                                 'destination':path[-1],
+        nodes_to_remove.update(nodes[i] for i in path[1:-1])
+        all_edges_to_add.append({'origin':nodes[path[0]],
+                                 'destination':nodes[path[-1]],
                                  'attr_dict':edge_attributes})
 
-    # for each edge to add in the list we assembled, create a new edge between the origin and destination
-    for edge in all_edges_to_add:
-        G.add_edge(edge['origin'], edge['destination'], **edge['attr_dict'])
-
-    # finally remove all the interstitial nodes between the new edges
-    G.remove_nodes_from(set(all_nodes_to_remove))
+    # rebuild the graph in one pass from the surviving nodes, the edges between them and the new simplified edges,
+    # rather than adding each new edge to G and then deleting the interstitial nodes from it.
+    # add_nodes_from and add_edges_from give H its own attribute dicts, so it doesn't alias the input graph's
+    H = G.__class__()
+    H.graph.update(G.graph)
+    H.add_nodes_from((node, data) for node, data in G.nodes_iter(data=True) if node not in nodes_to_remove)
+    H.add_edges_from((u, v, key, data) for u, v, key, data in G.edges_iter(data=True, keys=True)
+                     if u not in nodes_to_remove and v not in nodes_to_remove)
+    # a path can stop on an interstitial node without closing, its new edge is dropped along with that node
+    H.add_edges_from((edge['origin'], edge['destination'], edge['attr_dict']) for edge in all_edges_to_add
+                     if edge['origin'] not in nodes_to_remove and edge['destination'] not in nodes_to_remove)
+    G = H
+    G.graph['_simplified'] = True
 
     msg = 'Simplified graph (from {:,} to {:,} nodes and from {:,} to {:,} edges) in {:,.2f} seconds'
-    log(msg.format(initial_node_count, len(list(G.nodes())), initial_edge_count, len(list(G.edges())), time.time()-start_time))
+    log(msg.format(initial_node_count, G.number_of_nodes(), initial_edge_count,
+                   sum(len(keys) for nbrs in G.succ.values() for keys in nbrs.values()), time.time()-start_time))
     return G
\ No newline at end of file
@@ -0,0 +1,101 @@
+#tests for the overwritten OSMNX simplify algorithm
+
+import random
+from fractions import Fraction
+
+import pytest
+
+nx = pytest.importorskip('networkx')
+pytest.importorskip('osmnx')
+pytest.importorskip('shapely')
+np = pytest.importorskip('numpy')
+
+if int(nx.__version__.split('.')[0]) >= 2:
+    pytest.skip('osmnx_simplify_overwrite uses the networkx 1.x graph API', allow_module_level=True)
+
+from osmnx_simplify_overwrite import get_path_edges, get_paths_to_simplify, merge_path_edges, simplify_graph
+
+
+def simplify_by_add_remove(G_, strict=True, sums=['length']):
+    """
+    Simplify the way simplify_graph used to: add each merged edge to a copy of the graph,
+    then remove all the interstitial nodes from it.
+    """
+    G = G_.copy()
+    paths = list(get_paths_to_simplify(G, strict=strict))
+    for path in paths:
+        coords = np.array([(G.node[node]['x'], G.node[node]['y']) for node in path])
+        G.add_edge(path[0], path[-1], **merge_path_edges(get_path_edges(G.adj, path), coords, sums))
+    G.remove_nodes_from(set(node for path in paths for node in path[1:-1]))
+    return G
+
+
+def normalize(val):
+    if isinstance(val, list):
+        return sorted(repr(v) for v in val)
+    if hasattr(val, 'coords'):
+        return list(val.coords)
+    return val
+
+
+def graph_signature(G):
+    nodes = sorted((node, sorted(data.items())) for node, data in G.nodes_iter(data=True))
+    edges = sorted((u, v, key, sorted((k, repr(normalize(d))) for k, d in data.items()))
+                   for u, v, key, data in G.edges_iter(data=True, keys=True))
+    return nodes, edges
+
+
+def random_network(seed):
+    r = random.Random(seed)
+    G = nx.MultiDiGraph()
+    for i in range(r.randint(5, 60)):
+        G.add_node(i, x=r.random(), y=r.random(), IsCentroid=int(r.random() < .05))
+    nodes = G.nodes()
+    for _ in range(r.randint(1, 6)):
+        chain = r.sample(nodes, r.randint(2, min(len(nodes), 15)))
+        osmid = r.randint(1, 3)
+        twoway = r.random() < .6
+        for u, v in zip(chain[:-1], chain[1:]):
+            G.add_edge(u, v, length=r.random(), osmid=osmid, highway=r.choice(['primary', 'residential']))
+            if twoway:
+                G.add_edge(v, u, length=r.random(), osmid=osmid, highway=r.choice(['primary', 'residential']))
+    oneway = [(u, v, data) for u, v, data in G.edges(data=True) if not G.has_edge(v, u)]
+    for _ in range(r.randint(0, 4)):
+        # parallel one-way edges, which leave some paths ending on an interstitial node
+        if oneway:
+            u, v, data = r.choice(oneway)
+            G.add_edge(u, v, **data)
+    G.remove_nodes_from([node for node in nodes if G.degree(node) == 0])
+    return G
+
+
+def test_path_ending_on_interstitial_node():
+    # x has a parallel inbound edge from q, so it is interstitial but the walk from s stops on it
+    G = nx.MultiDiGraph()
+    for node in ['s', 'p', 'x', 'q']:
+        G.add_node(node, x=0., y=0.)
+    for u, v in [('s', 'p'), ('p', 's'), ('p', 'x'), ('x', 'p'), ('q', 'x'), ('q', 'x')]:
+        G.add_edge(u, v, length=1., osmid=1)
+
+    simplified = simplify_graph(G)
+    assert sorted(simplified.nodes()) == ['q', 's']
+    assert simplified.edges() == [('q', 's')]
+    assert graph_signature(simplified) == graph_signature(simplify_by_add_remove(G))
+
+
+@pytest.mark.parametrize('values', [[1.] * 12, [1] * 12, [2 ** 70] * 12, [np.float64(1.5)] * 12,
+                                    [Fraction(1, 3)] * 12])
+def test_long_path_sums_match_python_sum(values):
+    path_edges = [{'length': val} for val in values]
+    coords = np.zeros((len(values) + 1, 2))
+    total = merge_path_edges(path_edges, coords)['length']
+    assert total == sum(values)
+    assert type(total) is type(sum(values))
+
+
+@pytest.mark.parametrize('strict', [True, False])
+def test_matches_add_remove(strict):
+    for seed in range(1000):
+        G = random_network(seed)
+        assert graph_signature(simplify_graph(G, strict=strict)) == \
+            graph_signature(simplify_by_add_remove(G, strict=strict)), seed